@@ -0,0 +1,198 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import namedtuple
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+
+class AdmissionRejected(Exception):
+    """Raised when a generation request cannot be admitted"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class _Waiter:
+    def __init__(self, user_key, priority):
+        self.user_key = user_key
+        self.priority = priority
+        self.granted = False
+
+
+AdmissionTicket = namedtuple('AdmissionTicket', ['user_key', 'started', 'priority'])
+
+
+class AdmissionController:
+    """Limit concurrent quiz generations per user and across the whole server.
+
+    Each user gets a token bucket (rate quota) and a concurrency cap. When the
+    global in-flight cap or the user's cap is reached, requests wait in a
+    priority queue where interactive quizzes are dispatched ahead of batch
+    jobs. A full queue, an exhausted rate quota or a wait that runs past
+    ``queue_timeout`` raises ``AdmissionRejected`` with a Retry-After hint.
+
+    Callers can ask for batch priority but cannot claim interactive: a
+    request from a user who already has a generation in flight or queued is
+    demoted to batch, so a script firing requests in parallel queues behind
+    other users' single quizzes. A script that waits for each response
+    before sending the next stays interactive and is held back only by its
+    rate quota.
+    """
+
+    def __init__(self, max_in_flight=4, per_user_concurrency=2,
+                 per_user_rate=10, rate_window=60.0, max_queue=20,
+                 per_user_queue=4, queue_timeout=30.0, clock=time.monotonic):
+        self.max_in_flight = max_in_flight
+        self.per_user_concurrency = per_user_concurrency
+        self.per_user_rate = per_user_rate
+        self.rate_window = rate_window
+        self.max_queue = max_queue
+        self.per_user_queue = per_user_queue
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._user_in_flight = {}
+        self._user_queued = {}
+        self._buckets = {}  # user_key -> (tokens, last_refill)
+        self._avg_service_time = 5.0
+
+    def acquire(self, user_key, priority=PRIORITY_INTERACTIVE):
+        """Block until a generation slot is granted; returns an ``AdmissionTicket``"""
+        with self._cond:
+            if self._user_in_flight.get(user_key) or self._user_queued.get(user_key):
+                priority = PRIORITY_BATCH
+
+            # Anything still queued while there is free global capacity is
+            # blocked by its own user's cap, so this user can go ahead of it.
+            if self._has_capacity(user_key):
+                self._take_rate_token(user_key)
+                self._grant(user_key)
+                return AdmissionTicket(user_key, self._clock(), priority)
+
+            if len(self._queue) >= self.max_queue:
+                raise AdmissionRejected('Server is busy, generation queue is full',
+                                        self._estimate_wait(len(self._queue)))
+            if self._user_queued.get(user_key, 0) >= self.per_user_queue:
+                raise AdmissionRejected('Too many queued generation requests for this user',
+                                        self._estimate_wait(self._user_queued[user_key]))
+
+            self._take_rate_token(user_key)
+            waiter = _Waiter(user_key, priority)
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            self._user_queued[user_key] = self._user_queued.get(user_key, 0) + 1
+            self._dispatch()
+
+            # Condition.wait runs on real time, so the deadline does too
+            deadline = time.monotonic() + self.queue_timeout
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove_waiter(waiter)
+                    self._refund_rate_token(user_key)
+                    raise AdmissionRejected('Timed out waiting for a generation slot',
+                                            self._estimate_wait(len(self._queue)))
+                self._cond.wait(remaining)
+
+            return AdmissionTicket(user_key, self._clock(), priority)
+
+    def release(self, token):
+        """Free the slot held by ``token`` and hand it to the next waiter"""
+        with self._cond:
+            user_key = token.user_key
+            elapsed = self._clock() - token.started
+            self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * elapsed
+
+            self._in_flight -= 1
+            remaining = self._user_in_flight.get(user_key, 0) - 1
+            if remaining > 0:
+                self._user_in_flight[user_key] = remaining
+            else:
+                self._user_in_flight.pop(user_key, None)
+
+            self._dispatch()
+
+    def stats(self):
+        """Snapshot of current load, useful for debugging and load tests"""
+        with self._cond:
+            return {
+                'in_flight': self._in_flight,
+                'queued': len(self._queue),
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'avg_service_time': round(self._avg_service_time, 2)
+            }
+
+    def _has_capacity(self, user_key):
+        return (self._in_flight < self.max_in_flight and
+                self._user_in_flight.get(user_key, 0) < self.per_user_concurrency)
+
+    def _grant(self, user_key):
+        self._in_flight += 1
+        self._user_in_flight[user_key] = self._user_in_flight.get(user_key, 0) + 1
+
+    def _dispatch(self):
+        """Grant free slots to queued waiters in priority order.
+
+        Waiters whose user is already at the concurrency cap are skipped so
+        they don't hold up other users behind them.
+        """
+        if self._in_flight >= self.max_in_flight or not self._queue:
+            return
+
+        granted_any = False
+        remaining = []
+        for entry in sorted(self._queue):
+            waiter = entry[2]
+            if self._in_flight < self.max_in_flight and self._has_capacity(waiter.user_key):
+                self._grant(waiter.user_key)
+                self._dequeued(waiter.user_key)
+                waiter.granted = True
+                granted_any = True
+            else:
+                remaining.append(entry)
+
+        if granted_any:
+            self._queue = remaining
+            heapq.heapify(self._queue)
+            self._cond.notify_all()
+
+    def _remove_waiter(self, waiter):
+        self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+        heapq.heapify(self._queue)
+        self._dequeued(waiter.user_key)
+
+    def _dequeued(self, user_key):
+        queued = self._user_queued.get(user_key, 0) - 1
+        if queued > 0:
+            self._user_queued[user_key] = queued
+        else:
+            self._user_queued.pop(user_key, None)
+
+    def _take_rate_token(self, user_key):
+        now = self._clock()
+        refill_rate = self.per_user_rate / self.rate_window
+        tokens, last = self._buckets.get(user_key, (float(self.per_user_rate), now))
+        tokens = min(float(self.per_user_rate), tokens + (now - last) * refill_rate)
+
+        if tokens < 1:
+            self._buckets[user_key] = (tokens, now)
+            raise AdmissionRejected('Generation rate limit exceeded',
+                                    (1 - tokens) / refill_rate)
+
+        self._buckets[user_key] = (tokens - 1, now)
+
+    def _refund_rate_token(self, user_key):
+        tokens, last = self._buckets[user_key]
+        self._buckets[user_key] = (min(float(self.per_user_rate), tokens + 1), last)
+
+    def _estimate_wait(self, ahead):
+        return self._avg_service_time * (ahead + 1) / max(1, self.max_in_flight)
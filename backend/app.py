@@ -2,6 +2,7 @@ from flask import Flask, request, jsonify, send_from_directory, redirect, url_fo
 from flask_cors import CORS
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from models import db, User
+from admission import AdmissionController, AdmissionRejected, PRIORITY_INTERACTIVE, PRIORITY_BATCH
 import PyPDF2
 import os
 import json
@@ -27,6 +28,17 @@ db.init_app(app)
 genai.configure(api_key=os.getenv('GOOGLE_GEMINI_API_KEY'))
 ai_model = genai.GenerativeModel('gemini-2.5-flash')
 
+# Admission control for quiz generation
+generation_admission = AdmissionController(
+    max_in_flight=int(os.getenv('GENERATION_MAX_IN_FLIGHT', 4)),
+    per_user_concurrency=int(os.getenv('GENERATION_PER_USER_CONCURRENCY', 2)),
+    per_user_rate=int(os.getenv('GENERATION_PER_USER_RATE', 10)),
+    rate_window=float(os.getenv('GENERATION_RATE_WINDOW', 60)),
+    max_queue=int(os.getenv('GENERATION_MAX_QUEUE', 20)),
+    per_user_queue=int(os.getenv('GENERATION_PER_USER_QUEUE', 4)),
+    queue_timeout=float(os.getenv('GENERATION_QUEUE_TIMEOUT', 30))
+)
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -165,19 +177,46 @@ def generate_quiz():
         if not pdf_text:
             return jsonify({'error': 'No text provided for quiz generation'}), 400
         
+        # Clients may opt into batch; the controller demotes callers with a backlog
+        priority = PRIORITY_BATCH if data.get('priority') == 'batch' else PRIORITY_INTERACTIVE
+
+        try:
+            ticket = generation_admission.acquire(get_admission_key(), priority)
+        except AdmissionRejected as e:
+            print(f"⏳ Generation request rejected: {str(e)}")
+            response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
+
         print(f"🎯 Creating {question_count} professional {quiz_type} questions from PDF content...")
-       
-        quiz = generate_professional_quiz(pdf_text, quiz_type, question_count, difficulty)
+
+        try:
+            quiz = generate_professional_quiz(pdf_text, quiz_type, question_count, difficulty)
+        finally:
+            generation_admission.release(ticket)
         
         return jsonify({
             'success': True,
-            'quiz': quiz
+            'quiz': quiz,
+            'priority': 'batch' if ticket.priority == PRIORITY_BATCH else 'interactive'
         })
     
     except Exception as e:
         print(f"❌ Error in generate_quiz: {str(e)}")
         return jsonify({'error': f'Error generating quiz: {str(e)}'}), 500
 
+@app.route('/api/generation-status')
+@login_required
+def generation_status():
+    """Current load on the quiz generation admission controller"""
+    return jsonify(generation_admission.stats())
+
+def get_admission_key():
+    """Identify the caller for per-user generation quotas"""
+    if current_user.is_authenticated:
+        return f'user:{current_user.id}'
+    return f'ip:{request.remote_addr}'
+
 def extract_text_from_pdf(file_path):
     try:
         with open(file_path, 'rb') as file:
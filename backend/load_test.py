@@ -0,0 +1,121 @@
+"""Local load test for /api/generate-quiz admission control.
+
+Start the server (python app.py) and run, for example:
+
+    python load_test.py --users 3 --requests 20 --concurrency 12 --batch-ratio 0.5
+
+Each simulated user registers/logs in with its own session, then fires
+generation requests. The summary shows how many were admitted (200) or
+rejected (429), the Retry-After values returned, and latency per priority
+as reported by the server (requests from a user with a backlog run as batch).
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+SAMPLE_TEXT = (
+    "The Industrial Revolution began in Britain around 1760. "
+    "Steam engines increased factory output by more than 50% compared to manual labour. "
+    "James Watt improved the steam engine in 1776, which is known as a turning point. "
+) * 20
+
+
+def make_opener():
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+
+def post_json(opener, url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with opener.open(request) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def login_user(base_url, index):
+    opener = make_opener()
+    credentials = {
+        'username': f'loadtest{index}',
+        'email': f'loadtest{index}@example.com',
+        'password': 'loadtest-password'
+    }
+    status, _, _ = post_json(opener, f'{base_url}/register', credentials)
+    if status != 200:
+        status, _, body = post_json(opener, f'{base_url}/login', credentials)
+        if status != 200:
+            raise SystemExit(f'Could not log in loadtest{index}: {body[:200]}')
+    return opener
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test quiz generation admission control')
+    parser.add_argument('--base-url', default='http://localhost:5000/api')
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=20, help='requests per user')
+    parser.add_argument('--concurrency', type=int, default=12)
+    parser.add_argument('--batch-ratio', type=float, default=0.5,
+                        help='fraction of requests sent with priority=batch')
+    args = parser.parse_args()
+
+    openers = [login_user(args.base_url, i) for i in range(args.users)]
+    results = []
+    lock = threading.Lock()
+
+    def fire(user_index, request_index):
+        is_batch = (request_index * 100 // args.requests) < args.batch_ratio * 100
+        payload = {
+            'text': SAMPLE_TEXT,
+            'quiz_type': 'multiple_choice',
+            'question_count': 5,
+            'priority': 'batch' if is_batch else 'interactive'
+        }
+        started = time.monotonic()
+        status, headers, body = post_json(openers[user_index], f'{args.base_url}/generate-quiz', payload)
+        # The server may demote a request to batch; report what it actually ran as
+        priority = json.loads(body).get('priority', payload['priority']) if status == 200 else payload['priority']
+        with lock:
+            results.append({
+                'user': user_index,
+                'priority': priority,
+                'status': status,
+                'retry_after': headers.get('Retry-After'),
+                'latency': time.monotonic() - started
+            })
+
+    jobs = [(u, r) for r in range(args.requests) for u in range(args.users)]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(fire, user_index, request_index)
+                   for user_index, request_index in jobs]
+        for future in futures:
+            future.result()
+    elapsed = time.monotonic() - started
+
+    print(f"Sent {len(results)} requests in {elapsed:.1f}s")
+    print(f"Status codes: {dict(Counter(r['status'] for r in results))}")
+    print(f"Per user: {dict(Counter((r['user'], r['status']) for r in results))}")
+    retry_afters = [int(r['retry_after']) for r in results if r['retry_after']]
+    if retry_afters:
+        print(f"Retry-After range: {min(retry_afters)}s - {max(retry_afters)}s")
+    for priority in ('interactive', 'batch'):
+        latencies = sorted(r['latency'] for r in results
+                           if r['priority'] == priority and r['status'] == 200)
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{priority:>11} admitted={len(latencies)} p50={p50:.2f}s p95={p95:.2f}s")
+
+    with openers[0].open(f'{args.base_url}/generation-status') as response:
+        print(f"Server status: {response.read().decode('utf-8')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not reached in time')
+        time.sleep(0.005)
+
+
+def start_waiter(controller, user_key, priority, granted):
+    """Acquire in a background thread, recording the user key once granted"""
+    def run():
+        ticket = controller.acquire(user_key, priority)
+        granted.append(user_key)
+        controller.release(ticket)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_interactive_granted_before_batch():
+    controller = AdmissionController(max_in_flight=1, queue_timeout=5)
+    holder = controller.acquire('holder')
+    granted = []
+
+    threads = [start_waiter(controller, 'batch-user', PRIORITY_BATCH, granted)]
+    wait_until(lambda: controller.stats()['queued'] == 1)
+    threads.append(start_waiter(controller, 'teacher', PRIORITY_INTERACTIVE, granted))
+    wait_until(lambda: controller.stats()['queued'] == 2)
+
+    controller.release(holder)
+    for thread in threads:
+        thread.join()
+
+    assert granted == ['teacher', 'batch-user']
+
+
+def test_user_with_backlog_is_demoted_to_batch():
+    controller = AdmissionController(max_in_flight=4, per_user_concurrency=2)
+    first = controller.acquire('script')
+    second = controller.acquire('script', PRIORITY_INTERACTIVE)
+
+    assert first.priority == PRIORITY_INTERACTIVE
+    assert second.priority == PRIORITY_BATCH
+
+
+def test_per_user_concurrency_cap():
+    controller = AdmissionController(max_in_flight=10, per_user_concurrency=1, queue_timeout=5)
+    ticket = controller.acquire('a')
+    granted = []
+
+    thread = start_waiter(controller, 'a', PRIORITY_INTERACTIVE, granted)
+    wait_until(lambda: controller.stats()['queued'] == 1)
+    assert controller.stats()['in_flight'] == 1
+
+    # Another user is not held back by the capped waiter
+    other = controller.acquire('b')
+    assert controller.stats()['in_flight'] == 2
+    controller.release(other)
+
+    controller.release(ticket)
+    thread.join()
+    assert granted == ['a']
+
+
+def test_global_in_flight_cap():
+    controller = AdmissionController(max_in_flight=2, per_user_concurrency=5, queue_timeout=5)
+    tickets = [controller.acquire('a'), controller.acquire('b')]
+    granted = []
+
+    thread = start_waiter(controller, 'c', PRIORITY_INTERACTIVE, granted)
+    wait_until(lambda: controller.stats()['queued'] == 1)
+    assert granted == []
+
+    controller.release(tickets[0])
+    thread.join()
+    assert granted == ['c']
+    controller.release(tickets[1])
+    assert controller.stats()['in_flight'] == 0
+
+
+def test_token_bucket_refills_with_clock():
+    clock = FakeClock()
+    controller = AdmissionController(per_user_rate=2, rate_window=60, clock=clock)
+    controller.release(controller.acquire('a'))
+    controller.release(controller.acquire('a'))
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('a')
+    assert excinfo.value.retry_after == 30
+
+    clock.now += 30
+    controller.release(controller.acquire('a'))
+
+
+def test_queue_full_rejects_with_retry_after():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+    holder = controller.acquire('a')
+    granted = []
+
+    thread = start_waiter(controller, 'b', PRIORITY_INTERACTIVE, granted)
+    wait_until(lambda: controller.stats()['queued'] == 1)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('c')
+    assert 'queue is full' in str(excinfo.value)
+    assert 1 <= excinfo.value.retry_after <= 60
+
+    controller.release(holder)
+    thread.join()
+
+
+def test_per_user_queue_limit_rejects():
+    controller = AdmissionController(max_in_flight=1, max_queue=10, per_user_queue=1, queue_timeout=5)
+    holder = controller.acquire('a')
+    granted = []
+
+    thread = start_waiter(controller, 'b', PRIORITY_INTERACTIVE, granted)
+    wait_until(lambda: controller.stats()['queued'] == 1)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('b')
+    assert 'Too many queued' in str(excinfo.value)
+    assert 1 <= excinfo.value.retry_after <= 60
+
+    controller.release(holder)
+    thread.join()
+
+
+def test_queue_rejections_do_not_consume_rate_tokens():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, per_user_rate=3, queue_timeout=5)
+    holder = controller.acquire('a')
+    granted = []
+
+    thread = start_waiter(controller, 'b', PRIORITY_INTERACTIVE, granted)
+    wait_until(lambda: controller.stats()['queued'] == 1)
+
+    for _ in range(5):
+        with pytest.raises(AdmissionRejected) as excinfo:
+            controller.acquire('c')
+        assert 'queue is full' in str(excinfo.value)
+
+    controller.release(holder)
+    thread.join()
+    for _ in range(3):
+        controller.release(controller.acquire('c'))
+
+
+def test_full_queue_does_not_block_user_with_free_capacity():
+    controller = AdmissionController(max_in_flight=10, per_user_concurrency=1, max_queue=2, queue_timeout=5)
+    holder = controller.acquire('a')
+    granted = []
+
+    threads = [start_waiter(controller, 'a', PRIORITY_INTERACTIVE, granted) for _ in range(2)]
+    wait_until(lambda: controller.stats()['queued'] == 2)
+
+    ticket = controller.acquire('b')
+    controller.release(ticket)
+
+    controller.release(holder)
+    for thread in threads:
+        thread.join()
+    assert granted == ['a', 'a']
+
+
+def test_timeout_removes_waiter_and_refunds_token():
+    controller = AdmissionController(max_in_flight=1, per_user_rate=1, queue_timeout=0.05)
+    holder = controller.acquire('a')
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('b')
+    assert 'Timed out' in str(excinfo.value)
+    assert controller.stats()['queued'] == 0
+    assert 'b' not in controller._user_queued
+
+    controller.release(holder)
+    controller.release(controller.acquire('b'))
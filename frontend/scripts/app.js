@@ -147,10 +147,15 @@ async function generateQuiz() {
 
         const data = await response.json();
 
+        if (response.status === 429) {
+            const retryAfter = response.headers.get('Retry-After') || data.retry_after;
+            throw new Error(`${data.error || 'Too many requests'}. Please try again in ${retryAfter} seconds.`);
+        }
+
         if (!response.ok) {
             throw new Error(data.error || 'Failed to generate quiz');
         }
-        
+
         currentQuiz = {
             ...currentQuiz,
             ...data.quiz